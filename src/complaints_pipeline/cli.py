@@ -2,19 +2,20 @@ from __future__ import annotations
 from .msforms_poll import run_msforms_poll
 
 import argparse
-import json
 import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
+import orjson
+
 from .backup import backup_to_csv
 from .dispatch_payload import parse_submission
 from .form_mapping import normalize_fields
 from .graph import GraphApp, get_default_drive_id, get_site_id, get_token, upload_file_put_content
 from .notify import send_mail_with_attachments
-from .pdf_report import build_pdf_bytes
+from .pdf_report import build_pdf_to_path
 from .sheets import DEFAULT_WORKSHEET, auth_sheets, get_or_create_worksheet, open_spreadsheet
 from .util import iso_date_parts, safe_filename, utc_ts
 
@@ -169,7 +170,7 @@ def run_dispatch(args: argparse.Namespace) -> int:
     log = logging.getLogger("complaints_pipeline.dispatch")
 
     event_path = require("GITHUB_EVENT_PATH/--event-path", args.event_path)
-    event = json.loads(Path(event_path).read_text(encoding="utf-8"))
+    event = orjson.loads(Path(event_path).read_bytes())
     sub = parse_submission(event)
     log.info("Loaded submission id=%s", sub.submission_id)
 
@@ -178,21 +179,20 @@ def run_dispatch(args: argparse.Namespace) -> int:
     if not norm.get("submission_timestamp") and sub.timestamp:
         norm["submission_timestamp"] = sub.timestamp
 
-    pdf_bytes = build_pdf_bytes(args.title, norm)
-
     safe_id = safe_filename(sub.submission_id)
     out_dir = Path(args.backup_dir) / "submissions"
     out_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = out_dir / f"complaint_{safe_id}.pdf"
-    pdf_path.write_bytes(pdf_bytes)
+    pdf_path = build_pdf_to_path(out_dir / f"complaint_{safe_id}.pdf", args.title, norm)
     log.info("PDF written: %s", pdf_path)
 
     uploaded_pdf = None
     uploaded_json = None
 
+    ge = None
     token = None
     drive_id = None
 
+    # Graph env/token/drive resolved once and shared by upload + email
     if args.sp_upload or args.email:
         ge = load_graph_env()
         token = get_token(GraphApp(ge.tenant_id, ge.client_id, ge.client_secret))
@@ -200,15 +200,14 @@ def run_dispatch(args: argparse.Namespace) -> int:
         drive_id = get_default_drive_id(token, site_id)
 
     if args.sp_upload:
-        ge = load_graph_env()
         y, m, d = iso_date_parts(norm.get("submission_timestamp", "") or sub.timestamp or "")
         remote_folder = f"{ge.folder}/Submissions/{y}/{m}/{d}"
         uploaded_pdf = upload_file_put_content(token, drive_id, pdf_path, remote_folder, content_type="text/plain")
         log.info("Uploaded PDF driveItem id=%s", uploaded_pdf.get("id"))
 
         meta_path = out_dir / f"complaint_{safe_id}.json"
-        meta_path.write_text(
-            json.dumps(
+        meta_path.write_bytes(
+            orjson.dumps(
                 {
                     "submission_id": sub.submission_id,
                     "form_title": sub.form_title,
@@ -216,9 +215,8 @@ def run_dispatch(args: argparse.Namespace) -> int:
                     "recipients": sub.email_to,
                     "fields": norm,
                 },
-                indent=2,
-            ),
-            encoding="utf-8",
+                option=orjson.OPT_INDENT_2,
+            )
         )
         uploaded_json = upload_file_put_content(token, drive_id, meta_path, remote_folder, content_type="text/plain")
         log.info("Uploaded JSON driveItem id=%s", uploaded_json.get("id"))
@@ -1,25 +1,61 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional
 
-from .schema import QUESTION_MAP, SHEET_COLUMNS, normalize_question
+from .schema import NORMALIZED_QUESTION_MAP, SHEET_COLUMNS, SHEET_COLUMNS_SET, canonical_question
 
+_EMPTY_TEMPLATE: Dict[str, Any] = dict.fromkeys(SHEET_COLUMNS, "")
 
-def normalize_fields(raw_fields: Dict[str, Any]) -> Dict[str, Any]:
+
+def _resolve_key(k: Any) -> Optional[str]:
+    mapped = NORMALIZED_QUESTION_MAP.get(canonical_question(str(k)))
+    if mapped:
+        return mapped
+    if k in SHEET_COLUMNS_SET:
+        return k
+    return None
+
+
+def build_key_translator(raw_keys: Iterable[str]) -> Dict[str, str]:
+    """Resolve each raw field name to its schema column once.
+
+    Callers that see the same keys on every row (the MS Forms poll) pass the
+    result to ``normalize_fields`` to skip per-row question normalization.
+    Keys that map to no schema column are left out.
+    """
+    out: Dict[str, str] = {}
+    for k in raw_keys:
+        nk = _resolve_key(k)
+        if nk:
+            out[k] = nk
+    return out
+
+
+def normalize_fields(
+    raw_fields: Dict[str, Any], translator: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """Map arbitrary form fields into normalized keys, preserving QAF schema keys.
 
     Apps Script already sends normalized keys, but this keeps Python robust if
-    payload fields are still raw question titles.
+    payload fields are still raw question titles. ``translator`` is an optional
+    precomputed ``build_key_translator`` result for the keys of ``raw_fields``.
     """
-    out: Dict[str, Any] = {k: "" for k in SHEET_COLUMNS}
-
-    for k, v in (raw_fields or {}).items():
-        nk = normalize_question(str(k))
-        mapped = QUESTION_MAP.get(nk)
-        if mapped:
-            out[mapped] = v
-        elif k in out:
-            out[k] = v
+    out: Dict[str, Any] = _EMPTY_TEMPLATE.copy()
+
+    if raw_fields and raw_fields.keys() <= SHEET_COLUMNS_SET:
+        # Fast path: Apps Script payloads already use schema keys, and every
+        # schema key maps to itself.
+        out.update(raw_fields)
+    elif translator is not None:
+        for k, v in (raw_fields or {}).items():
+            nk = translator.get(k)
+            if nk:
+                out[nk] = v
+    else:
+        for k, v in (raw_fields or {}).items():
+            nk = _resolve_key(k)
+            if nk:
+                out[nk] = v
 
     # If someone sent a top-level 'timestamp' but not the system field
     if not out.get("submission_timestamp") and raw_fields.get("timestamp"):
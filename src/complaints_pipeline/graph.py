@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import base64
+import os
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -26,51 +31,239 @@ def session_with_retries() -> requests.Session:
         allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
         raise_on_status=False,
     )
-    s.mount("https://", HTTPAdapter(max_retries=retries))
+    s.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries))
     return s
 
 
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """Process-wide session so Graph calls reuse pooled keep-alive connections."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = session_with_retries()
+    return _SESSION
+
+
+GRAPH_BASE = "https://graph.microsoft.com/v1.0"
+GRAPH_SCOPE = "https://graph.microsoft.com/.default"
+
+# Graph JSON batching accepts at most 20 sub-requests per call.
+BATCH_MAX_REQUESTS = 20
+
+# Refresh tokens this many seconds before Graph says they expire.
+TOKEN_EXPIRY_SKEW = 300
+
+# (tenant_id, client_id, scope) -> (access_token, expires_on)
+_TOKEN_CACHE: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+_TOKEN_LOCK = threading.Lock()
+
+
+def cache_dir() -> Path:
+    """Local cache directory shared by runs on the same machine."""
+    override = os.getenv("COMPLAINTS_CACHE_DIR")
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "complaints_pipeline"
+
+
+def _load_msal_cache(msal, path: Path):
+    cache = msal.SerializableTokenCache()
+    try:
+        cache.deserialize(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    return cache
+
+
+def _save_msal_cache(cache, path: Path) -> None:
+    if not cache.has_state_changed:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The mode above only applies on creation; tighten an existing file too
+        os.chmod(path, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(cache.serialize())
+    except OSError:
+        # Best effort: a read-only home just means no cross-run reuse.
+        pass
+
+
 def get_token(app: GraphApp) -> str:
-    import msal
+    key = (app.tenant_id, app.client_id, GRAPH_SCOPE)
+    with _TOKEN_LOCK:
+        cached = _TOKEN_CACHE.get(key)
+        if cached and cached[1] > time.time():
+            return cached[0]
 
-    authority = f"https://login.microsoftonline.com/{app.tenant_id}"
-    cca = msal.ConfidentialClientApplication(
-        client_id=app.client_id,
-        authority=authority,
-        client_credential=app.client_secret,
-    )
-    result = cca.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
-    if "access_token" not in result:
-        raise RuntimeError(
-            f"Failed to acquire Graph token: {result.get('error')} {result.get('error_description')}"
+        import msal
+
+        cache_path = cache_dir() / "msal_cache.bin"
+        token_cache = _load_msal_cache(msal, cache_path)
+        authority = f"https://login.microsoftonline.com/{app.tenant_id}"
+        cca = msal.ConfidentialClientApplication(
+            client_id=app.client_id,
+            authority=authority,
+            client_credential=app.client_secret,
+            token_cache=token_cache,
         )
-    return result["access_token"]
+        # Client-credential tokens have no account; this checks token_cache first
+        result = cca.acquire_token_for_client(scopes=[GRAPH_SCOPE])
+        if "access_token" not in result:
+            raise RuntimeError(
+                f"Failed to acquire Graph token: {result.get('error')} {result.get('error_description')}"
+            )
+        _save_msal_cache(token_cache, cache_path)
+
+        expires_on = time.time() + int(result.get("expires_in", 0)) - TOKEN_EXPIRY_SKEW
+        _TOKEN_CACHE[key] = (result["access_token"], expires_on)
+        return result["access_token"]
+
+
+# Site and drive ids practically never change; re-resolve them once a day.
+SITE_CACHE_TTL = 24 * 3600
+
+_SITE_CACHE_LOCK = threading.Lock()
+
+
+def _site_cache_path() -> Path:
+    return cache_dir() / "site_cache.json"
+
+
+def _read_site_cache() -> Dict[str, Dict[str, Any]]:
+    try:
+        data = orjson.loads(_site_cache_path().read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_site_cache(data: Dict[str, Dict[str, Any]]) -> None:
+    path = _site_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(data))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _cached_id(key: str) -> Optional[str]:
+    with _SITE_CACHE_LOCK:
+        entry = _read_site_cache().get(key) or {}
+    if entry.get("id") and time.time() - float(entry.get("cached_at", 0)) < SITE_CACHE_TTL:
+        return str(entry["id"])
+    return None
+
+
+def _store_id(key: str, value: str) -> None:
+    with _SITE_CACHE_LOCK:
+        data = _read_site_cache()
+        data[key] = {"id": value, "cached_at": time.time()}
+        _write_site_cache(data)
+
+
+def forget_cached_id(value: str) -> None:
+    """Drop every cached site/drive entry resolving to ``value`` (e.g. after a 404)."""
+    with _SITE_CACHE_LOCK:
+        data = _read_site_cache()
+        kept = {k: v for k, v in data.items() if (v or {}).get("id") != value}
+        if len(kept) != len(data):
+            _write_site_cache(kept)
 
 
 def get_site_id(token: str, hostname: str, site_path: str) -> str:
     site_path = "/" + site_path.strip("/")
-    url = f"https://graph.microsoft.com/v1.0/sites/{hostname}:{site_path}"
-    s = session_with_retries()
+    key = f"site|{hostname}|{site_path}"
+    cached = _cached_id(key)
+    if cached:
+        return cached
+
+    url = f"{GRAPH_BASE}/sites/{hostname}:{site_path}"
+    s = shared_session()
     r = s.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=60)
     r.raise_for_status()
-    return r.json()["id"]
+    site_id = orjson.loads(r.content)["id"]
+    _store_id(key, site_id)
+    return site_id
 
 
 def get_default_drive_id(token: str, site_id: str) -> str:
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive"
-    s = session_with_retries()
+    key = f"drive|{site_id}"
+    cached = _cached_id(key)
+    if cached:
+        return cached
+
+    url = f"{GRAPH_BASE}/sites/{site_id}/drive"
+    s = shared_session()
     r = s.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=60)
+    if r.status_code == 404:
+        forget_cached_id(site_id)
     r.raise_for_status()
-    return r.json()["id"]
+    drive_id = orjson.loads(r.content)["id"]
+    _store_id(key, drive_id)
+    return drive_id
 
 
 def encode_graph_path(remote_folder: str, filename: str) -> str:
+    # Folder "/" separators stay as Graph expects; a "/" inside the filename
+    # itself is encoded as %2F
     remote_folder = remote_folder.strip("/")
-    parts = []
-    if remote_folder:
-        parts.extend(remote_folder.split("/"))
-    parts.append(filename)
-    return "/".join(quote(p, safe="") for p in parts)
+    name = quote(filename, safe="")
+    return f"{quote(remote_folder, safe='/')}/{name}" if remote_folder else name
+
+
+# Graph's simple PUT upload is limited to 4 MB; larger files need an upload session.
+SIMPLE_UPLOAD_MAX_BYTES = 4 << 20
+# Upload session chunks must be a multiple of 320 KiB.
+UPLOAD_CHUNK_BYTES = 32 * 320 * 1024
+
+
+def _upload_large_file(token: str, drive_id: str, local_path: Path, remote_path: str, size: int):
+    url = f"{GRAPH_BASE}/drives/{drive_id}/root:/{remote_path}:/createUploadSession"
+    s = shared_session()
+    r = s.post(
+        url,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        data=orjson.dumps({"item": {"@microsoft.graph.conflictBehavior": "replace"}}),
+        timeout=60,
+    )
+    if r.status_code == 404:
+        forget_cached_id(drive_id)
+    r.raise_for_status()
+    upload_url = orjson.loads(r.content)["uploadUrl"]
+
+    with local_path.open("rb") as f:
+        start = 0
+        while start < size:
+            # Never read past the size the session was declared with, even if
+            # the file (e.g. a live log) keeps growing
+            chunk = f.read(min(UPLOAD_CHUNK_BYTES, size - start))
+            if not chunk:
+                raise RuntimeError(
+                    f"{local_path} shrank during upload ({start} of {size} bytes sent)."
+                )
+            end = start + len(chunk) - 1
+            # uploadUrl is pre-authenticated; it must not carry the bearer token.
+            r = s.put(
+                upload_url,
+                headers={
+                    "Content-Length": str(len(chunk)),
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                },
+                data=chunk,
+                timeout=120,
+            )
+            r.raise_for_status()
+            start = end + 1
+    return orjson.loads(r.content)
 
 
 def upload_file_put_content(
@@ -83,15 +276,99 @@ def upload_file_put_content(
 ):
     name = remote_filename or local_path.name
     remote_path = encode_graph_path(remote_folder=remote_folder, filename=name)
-    url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{remote_path}:/content"
-    data = local_path.read_bytes()
+    size = local_path.stat().st_size
+    if size > SIMPLE_UPLOAD_MAX_BYTES:
+        return _upload_large_file(token, drive_id, local_path, remote_path, size)
 
-    s = session_with_retries()
+    url = f"{GRAPH_BASE}/drives/{drive_id}/root:/{remote_path}:/content"
+    # Snapshot exactly `size` bytes (at most SIMPLE_UPLOAD_MAX_BYTES): a file
+    # that is still being written, like the run log, could otherwise send more
+    # than the declared length when a retry rewinds and re-reads the handle.
+    with local_path.open("rb") as f:
+        data = f.read(size)
+    s = shared_session()
     r = s.put(
         url,
         headers={"Authorization": f"Bearer {token}", "Content-Type": content_type},
         data=data,
         timeout=120,
     )
+    if r.status_code == 404:
+        # A missing folder is created by the PUT, so 404 means the drive itself is gone
+        forget_cached_id(drive_id)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
+
+
+def upload_put_content_request(
+    request_id: str,
+    drive_id: str,
+    local_path: Path,
+    remote_folder: str,
+    remote_filename: Optional[str] = None,
+    content_type: str = "text/plain",
+) -> Dict[str, Any]:
+    """Build a $batch sub-request equivalent to ``upload_file_put_content``."""
+    name = remote_filename or local_path.name
+    remote_path = encode_graph_path(remote_folder=remote_folder, filename=name)
+    entry: Dict[str, Any] = {
+        "id": request_id,
+        "method": "PUT",
+        "url": f"/drives/{drive_id}/root:/{remote_path}:/content",
+        "headers": {"Content-Type": content_type},
+    }
+    data = local_path.read_bytes()
+    if content_type.split(";", 1)[0].strip().lower() == "application/json":
+        # $batch reads a JSON-typed body as JSON (a string would be uploaded
+        # literally), so it goes in as the parsed document.
+        entry["body"] = orjson.loads(data)
+    else:
+        # Other bodies travel base64-encoded inside the batch envelope.
+        entry["body"] = base64.b64encode(data).decode("ascii")
+    return entry
+
+
+def _retry_after(response: Dict[str, Any], default: float = 1.0, cap: float = 60.0) -> float:
+    headers = {str(k).lower(): v for k, v in (response.get("headers") or {}).items()}
+    try:
+        return min(float(headers.get("retry-after", default)), cap)
+    except (TypeError, ValueError):
+        return default
+
+
+def graph_batch(
+    token: str, entries: List[Dict[str, Any]], max_attempts: int = 5
+) -> Dict[str, Dict[str, Any]]:
+    """POST up to 20 sub-requests to Graph's JSON ``$batch`` endpoint.
+
+    Returns the sub-responses keyed by request id. Sub-requests throttled with
+    429 are re-sent after the largest Retry-After reported by the batch.
+    """
+    if len(entries) > BATCH_MAX_REQUESTS:
+        raise ValueError(f"A Graph batch holds at most {BATCH_MAX_REQUESTS} requests.")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(entries)
+    s = shared_session()
+
+    for attempt in range(max_attempts):
+        r = s.post(
+            f"{GRAPH_BASE}/$batch",
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            data=orjson.dumps({"requests": pending}),
+            timeout=120,
+        )
+        r.raise_for_status()
+        by_id = {str(x.get("id")): x for x in orjson.loads(r.content).get("responses", [])}
+
+        throttled = {i for i, x in by_id.items() if x.get("status") == 429}
+        for i, x in by_id.items():
+            if i not in throttled or attempt == max_attempts - 1:
+                results[i] = x
+        if not throttled or attempt == max_attempts - 1:
+            break
+
+        time.sleep(max(_retry_after(by_id[i]) for i in throttled))
+        pending = [e for e in pending if e["id"] in throttled]
+
+    return results
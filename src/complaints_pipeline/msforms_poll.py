@@ -1,24 +1,35 @@
 from __future__ import annotations
 
-import json
+import itertools
 import logging
 import os
-from dataclasses import dataclass
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import quote
 
-from .form_mapping import normalize_fields
+import orjson
+import requests
+
+from .form_mapping import build_key_translator, normalize_fields
 from .graph import (
+    BATCH_MAX_REQUESTS,
+    GRAPH_BASE,
     GraphApp,
+    forget_cached_id,
     get_default_drive_id,
     get_site_id,
     get_token,
-    session_with_retries,
+    graph_batch,
+    shared_session,
     upload_file_put_content,
+    upload_put_content_request,
 )
 from .notify import send_mail_with_attachments
-from .pdf_report import build_pdf_bytes
+from .pdf_report import build_pdf_to_path
 from .util import iso_date_parts, safe_filename, utc_ts
 
 
@@ -31,6 +42,30 @@ SYSTEM_COLS = {"id", "start time", "completion time", "email", "name"}
 # Your tracking column
 PROCESSED_COL_CANDIDATES = {"processed", "is processed", "done"}
 
+# Processed-column values meaning "already handled"
+PROCESSED_VALUES = frozenset({"yes", "true", "1", "y", "done"})
+
+# Each row contributes a PDF upload + JSON upload to a batch.
+ROWS_PER_BATCH = BATCH_MAX_REQUESTS // 2
+
+# Files above this size are uploaded directly instead of inlined (base64) in a
+# batch; the whole batch body must also stay well under Graph's 4 MB limit.
+BATCH_INLINE_MAX_BYTES = 1 << 20
+BATCH_MAX_BODY_BYTES = 3 << 20
+
+# First cell of an A1-style range address, e.g. "F2" or "$F$2"
+_CELL_RE = re.compile(r"\$?([A-Za-z]+)\$?(\d+)")
+
+# Excel table rows fetched per Graph request
+ROWS_PAGE_SIZE = 500
+
+# Rows prepared, and separately batches uploaded, concurrently; override with
+# MSFORM_POLL_WORKERS.
+DEFAULT_POLL_WORKERS = 8
+
+# Notification emails sent concurrently in the background
+MAIL_WORKERS = 4
+
 
 @dataclass(frozen=True)
 class MsFormsExcelTarget:
@@ -40,6 +75,67 @@ class MsFormsExcelTarget:
     table_name: str           # e.g. Table1
 
 
+@dataclass(frozen=True)
+class _ColumnLayout:
+    # Resolved once per poll so rows are split by index, not per-key string work
+    field_indices: List[int]
+    field_names: List[str]
+    system_idx: Dict[str, int]   # normalized system column name -> index
+    translator: Dict[str, str]   # field name -> schema column
+
+
+@dataclass(frozen=True)
+class _PendingRow:
+    row_index: int
+    submission_id: str
+    timestamp: str
+    pdf_path: Path
+    meta_path: Path
+    remote_folder: str
+    values: List[Any]
+
+
+@dataclass
+class _MailQueue:
+    """Send notification emails off the upload path; failures are only logged."""
+
+    token: str
+    sender_upn: str
+    to_emails: List[str]
+    executor: ThreadPoolExecutor
+    futures: List[Tuple[str, Future]] = field(default_factory=list)
+
+    def submit(self, p: _PendingRow, pdf_item_id: str, json_item_id: str) -> None:
+        subject = f"New complaint submission: MSF-{p.submission_id}"
+        body = "\n".join(
+            [
+                "A new complaint was submitted via Microsoft Forms.",
+                f"Submission id: MSF-{p.submission_id}",
+                f"Timestamp: {p.timestamp}",
+                f"Uploaded PDF driveItem id: {pdf_item_id}",
+                f"Uploaded JSON driveItem id: {json_item_id}",
+            ]
+        )
+        # Attach PDF + JSON from disk; the worker reads them when it runs
+        f = self.executor.submit(
+            send_mail_with_attachments,
+            token=self.token,
+            sender_upn=self.sender_upn,
+            to_emails=self.to_emails,
+            subject=subject,
+            body_text=body,
+            attachments=[p.pdf_path, p.meta_path],
+        )
+        self.futures.append((p.submission_id, f))
+
+    def wait(self) -> None:
+        for submission_id, f in self.futures:
+            try:
+                f.result()
+            except Exception as e:
+                log.warning("Notification email failed for MSF-%s: %s", submission_id, e)
+
+
 def _require(name: str, value: Optional[str]) -> str:
     if not value:
         raise SystemExit(f"Missing required env var: {name}")
@@ -47,38 +143,38 @@ def _require(name: str, value: Optional[str]) -> str:
 
 
 def _encode_path(path: str) -> str:
-    # Encode each segment safely for Graph /root:/{path}:
-    parts = [p for p in path.split("/") if p]
-    return "/".join(quote(p, safe="") for p in parts)
+    # Encode safely for Graph /root:/{path}: keeping "/" separators; empty
+    # segments ("Forms//x.xlsx") are dropped
+    return quote("/".join(p for p in path.split("/") if p), safe="/")
 
 
 def _workbook_base(drive_id: str, file_path: str) -> str:
     p = _encode_path(file_path.strip("/"))
-    return f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{p}:/workbook"
+    return f"{GRAPH_BASE}/drives/{drive_id}/root:/{p}:/workbook"
 
 
 def _graph_get(token: str, url: str) -> Dict[str, Any]:
-    s = session_with_retries()
+    s = shared_session()
     r = s.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=60)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 
 def _graph_patch(token: str, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    s = session_with_retries()
+    s = shared_session()
     r = s.patch(
         url,
         headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        data=json.dumps(payload),
+        data=orjson.dumps(payload),
         timeout=60,
     )
     r.raise_for_status()
-    return r.json() if r.text else {}
+    return orjson.loads(r.content) if r.content else {}
 
 
 def _get_table_columns(token: str, wb_base: str, table_name: str) -> List[str]:
     # Returns column names in order
-    url = f"{wb_base}/tables/{quote(table_name)}/columns?$top=200"
+    url = f"{wb_base}/tables/{quote(table_name)}/columns?$select=name&$top=200"
     data = _graph_get(token, url)
     cols = []
     for c in data.get("value", []):
@@ -88,10 +184,16 @@ def _get_table_columns(token: str, wb_base: str, table_name: str) -> List[str]:
     return cols
 
 
-def _get_table_rows(token: str, wb_base: str, table_name: str, top: int = 5000) -> List[Dict[str, Any]]:
-    url = f"{wb_base}/tables/{quote(table_name)}/rows?$top={top}"
-    data = _graph_get(token, url)
-    return data.get("value", []) or []
+def _iter_table_rows(
+    token: str, wb_base: str, table_name: str, page_size: int = ROWS_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    # Page through the table so no single response has to carry the whole history
+    url = f"{wb_base}/tables/{quote(table_name)}/rows"
+    for skip in itertools.count(0, page_size):
+        page = _graph_get(token, f"{url}?$top={page_size}&$skip={skip}").get("value", []) or []
+        yield from page
+        if len(page) < page_size:
+            return
 
 
 def _update_row_values(token: str, wb_base: str, table_name: str, row_index: int, values: List[Any]) -> None:
@@ -101,6 +203,274 @@ def _update_row_values(token: str, wb_base: str, table_name: str, row_index: int
     _graph_patch(token, url, {"values": [values]})
 
 
+def _column_slice(address: str, first: int, last: int) -> Optional[Tuple[str, str]]:
+    # "'Form 1'!F2:F250" + data rows first..last -> ("Form 1", "F{2+first}:F{2+last}")
+    sheet, _, cells = address.rpartition("!")
+    m = _CELL_RE.fullmatch(cells.split(":")[0])
+    if not sheet or not m:
+        return None
+    if sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    col, row0 = m.group(1), int(m.group(2))
+    return sheet, f"{col}{row0 + first}:{col}{row0 + last}"
+
+
+def _mark_processed(
+    token: str, wb_base: str, table_name: str, processed_col: str, done: List[_PendingRow]
+) -> None:
+    """Set Processed=Yes on every row in ``done`` with a single range PATCH.
+
+    Only the rows from the first to the last done row are written, addressed by
+    sheet cells rather than the table column, so rows Forms appends meanwhile
+    neither resize the target nor get overwritten.
+    """
+    if not done:
+        return
+
+    def one_by_one() -> None:
+        for p in done:
+            _update_row_values(token, wb_base, table_name, p.row_index, p.values)
+
+    url = f"{wb_base}/tables/{quote(table_name)}/columns/{quote(processed_col, safe='')}/dataBodyRange"
+    try:
+        current = _graph_get(token, url)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code not in (400, 404):
+            raise
+        log.warning("Column %r not addressable by name; marking rows one by one.", processed_col)
+        one_by_one()
+        return
+
+    col = [r[0] if r else "" for r in current.get("values") or []]
+    min_idx = min(p.row_index for p in done)
+    max_idx = max(p.row_index for p in done)
+    if max_idx >= len(col):
+        raise RuntimeError(f"Row index {max_idx} is outside the '{processed_col}' column ({len(col)} rows).")
+
+    target = _column_slice(str(current.get("address") or ""), min_idx, max_idx)
+    if target is None:
+        log.warning("Unexpected range address %r; marking rows one by one.", current.get("address"))
+        one_by_one()
+        return
+
+    values = col[min_idx : max_idx + 1]
+    for p in done:
+        values[p.row_index - min_idx] = "Yes"
+    sheet, cells = target
+    _graph_patch(
+        token,
+        f"{wb_base}/worksheets/{quote(sheet, safe='')}/range(address='{cells}')",
+        {"values": [[v] for v in values]},
+    )
+
+
+def _ok(response: Optional[Dict[str, Any]]) -> bool:
+    return bool(response) and 200 <= int(response.get("status", 0)) < 300
+
+
+def _batch_body_size(path: Path) -> int:
+    size = path.stat().st_size
+    return 0 if size > BATCH_INLINE_MAX_BYTES else size * 4 // 3
+
+
+def _flush_pending(
+    token: str,
+    upload_drive_id: str,
+    pending: List[_PendingRow],
+    mail: Optional[_MailQueue],
+) -> Tuple[List[_PendingRow], List[str]]:
+    """Upload a group of rows with one Graph $batch call.
+
+    Returns the rows whose uploads succeeded and a description of each failed
+    row; failed rows stay unprocessed and are picked up again on the next poll.
+    """
+    entries: List[Dict[str, Any]] = []
+    uploaded: Dict[str, Dict[str, Any]] = {}
+
+    for n, p in enumerate(pending):
+        for kind, path, content_type in (
+            ("pdf", p.pdf_path, "application/pdf"),
+            ("json", p.meta_path, "application/json"),
+        ):
+            req_id = f"{n}-{kind}"
+            if path.stat().st_size > BATCH_INLINE_MAX_BYTES:
+                item = upload_file_put_content(token, upload_drive_id, path, p.remote_folder, content_type=content_type)
+                uploaded[req_id] = {"status": 200, "body": item}
+            else:
+                entries.append(
+                    upload_put_content_request(req_id, upload_drive_id, path, p.remote_folder, content_type=content_type)
+                )
+
+    responses = {**uploaded, **(graph_batch(token, entries) if entries else {})}
+
+    done: List[_PendingRow] = []
+    failures: List[str] = []
+    for n, p in enumerate(pending):
+        pdf_r, json_r = responses.get(f"{n}-pdf"), responses.get(f"{n}-json")
+        if not (_ok(pdf_r) and _ok(json_r)):
+            statuses = [(r or {}).get("status", "missing") for r in (pdf_r, json_r)]
+            if 404 in statuses:
+                # As in upload_file_put_content: a PUT creates missing folders,
+                # so 404 means the cached drive id is stale
+                forget_cached_id(upload_drive_id)
+            failures.append(f"row index={p.row_index} (pdf/json status {statuses})")
+            continue
+
+        # Email (optional)
+        if mail:
+            mail.submit(
+                p,
+                (pdf_r.get("body") or {}).get("id", "n/a"),
+                (json_r.get("body") or {}).get("id", "n/a"),
+            )
+
+        done.append(p)
+        log.info("Processed row index=%s submission_id=%s", p.row_index, p.submission_id)
+
+    return done, failures
+
+
+def _batches(prepared: Iterable[Optional[_PendingRow]]) -> Iterator[List[_PendingRow]]:
+    """Group prepared rows for ``_flush_pending``, skipping None.
+
+    A group closes at ROWS_PER_BATCH rows, or early when the next row's inlined
+    files would push the batch body past BATCH_MAX_BODY_BYTES.
+    """
+    pending: List[_PendingRow] = []
+    pending_bytes = 0
+    for p in prepared:
+        if p is None:
+            continue
+
+        row_body = _batch_body_size(p.pdf_path) + _batch_body_size(p.meta_path)
+        if len(pending) >= ROWS_PER_BATCH or (pending and pending_bytes + row_body > BATCH_MAX_BODY_BYTES):
+            yield pending
+            pending, pending_bytes = [], 0
+
+        pending.append(p)
+        pending_bytes += row_body
+
+    if pending:
+        yield pending
+
+
+def _needs_processing(row: Dict[str, Any], processed_idx: int) -> bool:
+    # Only looks at the Processed cell, so done rows cost no further parsing
+    if int(row.get("index", -1)) < 0:
+        return False
+    values = (row.get("values") or [[]])[0]
+    if not isinstance(values, list) or not values:
+        return False
+    already = str(values[processed_idx]).strip().lower() if processed_idx < len(values) else ""
+    return already not in PROCESSED_VALUES
+
+
+def _prepare_row(
+    row: Dict[str, Any], layout: _ColumnLayout, processed_idx: int, out_dir: Path, sp_folder: str
+) -> Optional[_PendingRow]:
+    """Build the PDF + JSON for one unprocessed row; None if the row is skipped."""
+    if not _needs_processing(row, processed_idx):
+        return None
+    row_index = int(row["index"])
+    values = row["values"][0]
+
+    def system(name: str) -> Any:
+        i = layout.system_idx.get(name)
+        return values[i] if i is not None and i < len(values) else None
+
+    # Pull some system fields we can use
+    submission_id = str(system("id") or f"row-{row_index}")
+    completion_time = str(system("completion time") or "")
+    start_time = str(system("start time") or "")
+    timestamp = completion_time or start_time
+
+    # Only form fields (no system columns, no Processed column) get mapped
+    n_values = len(values)
+    cleaned_fields: Dict[str, Any] = {
+        name: values[i] for i, name in zip(layout.field_indices, layout.field_names) if i < n_values
+    }
+
+    # Normalize to pipeline schema
+    norm = normalize_fields(cleaned_fields, layout.translator)
+
+    # If your MS Form doesn't have "date", set it from timestamp if possible
+    if not norm.get("date") and timestamp:
+        # keep as raw string (PDF just prints it). If you want strict formatting later, adjust here.
+        norm["date"] = timestamp
+
+    # Carry timestamp into system column
+    if not norm.get("submission_timestamp") and timestamp:
+        norm["submission_timestamp"] = timestamp
+
+    # Build PDF
+    safe_id = safe_filename(f"MSF-{submission_id}")
+    pdf_path = build_pdf_to_path(out_dir / f"complaint_{safe_id}.pdf", "Customer Complaint Form", norm)
+
+    meta_path = out_dir / f"complaint_{safe_id}.json"
+    meta_path.write_bytes(
+        orjson.dumps(
+            {
+                "source": "msforms_excel_poll",
+                "submission_id": submission_id,
+                "row_index": row_index,
+                "timestamp": timestamp,
+                "fields": norm,
+            },
+            option=orjson.OPT_INDENT_2,
+        )
+    )
+
+    y, m, d = iso_date_parts(norm.get("submission_timestamp", "") or timestamp or "")
+    remote_folder = f"{sp_folder}/Submissions/{y}/{m}/{d}"
+
+    # Mark row as processed
+    if processed_idx < len(values):
+        values[processed_idx] = "Yes"
+    else:
+        # pad if somehow shorter
+        values.extend([""] * (processed_idx - len(values) + 1))
+        values[processed_idx] = "Yes"
+
+    return _PendingRow(
+        row_index=row_index,
+        submission_id=submission_id,
+        timestamp=timestamp,
+        pdf_path=pdf_path,
+        meta_path=meta_path,
+        remote_folder=remote_folder,
+        values=values,
+    )
+
+
+def _poll_workers() -> int:
+    raw = os.getenv("MSFORM_POLL_WORKERS", "").strip()
+    if not raw:
+        return DEFAULT_POLL_WORKERS
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        raise SystemExit(f"MSFORM_POLL_WORKERS must be an integer, got {raw!r}")
+
+
+def _column_layout(cols: List[str]) -> _ColumnLayout:
+    field_indices: List[int] = []
+    field_names: List[str] = []
+    system_idx: Dict[str, int] = {}
+    for i, c in enumerate(cols):
+        kn = c.strip().lower()
+        if kn in SYSTEM_COLS:
+            system_idx.setdefault(kn, i)
+        elif kn not in PROCESSED_COL_CANDIDATES:
+            field_indices.append(i)
+            field_names.append(c)
+    return _ColumnLayout(
+        field_indices=field_indices,
+        field_names=field_names,
+        system_idx=system_idx,
+        translator=build_key_translator(field_names),
+    )
+
+
 def _split_emails(s: str) -> List[str]:
     return [e.strip() for e in (s or "").split(",") if e.strip()]
 
@@ -159,120 +529,54 @@ def run_msforms_poll(backup_dir: str = "backups") -> int:
     if processed_idx is None:
         raise RuntimeError("Could not find a 'Processed' column in the MS Forms table.")
 
-    rows = _get_table_rows(token, wb_base, msform_table_name)
+    rows = _iter_table_rows(token, wb_base, msform_table_name)
 
     out_dir = Path(backup_dir) / "msforms_submissions"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    processed_count = 0
-
-    for row in rows:
-        row_index = int(row.get("index", -1))
-        values = (row.get("values") or [[]])[0]
-        if row_index < 0 or not isinstance(values, list) or not values:
-            continue
-
-        # Skip if already processed
-        already = str(values[processed_idx]).strip().lower() if processed_idx < len(values) else ""
-        if already in {"yes", "true", "1", "y", "done"}:
-            continue
-
-        # Build dict from columns -> values
-        raw_row: Dict[str, Any] = {}
-        for c_name, v in zip(cols, values):
-            raw_row[c_name] = v
-
-        # Pull some system fields we can use
-        submission_id = str(raw_row.get("Id") or raw_row.get("id") or f"row-{row_index}")
-        completion_time = str(raw_row.get("Completion time") or raw_row.get("completion time") or "")
-        start_time = str(raw_row.get("Start time") or raw_row.get("start time") or "")
-        timestamp = completion_time or start_time
-
-        # Remove system columns and Processed column from the fields we map
-        cleaned_fields: Dict[str, Any] = {}
-        for k, v in raw_row.items():
-            kn = str(k).strip().lower()
-            if kn in SYSTEM_COLS:
-                continue
-            if kn in PROCESSED_COL_CANDIDATES:
-                continue
-            cleaned_fields[k] = v
-
-        # Normalize to pipeline schema
-        norm = normalize_fields(cleaned_fields)
-
-        # If your MS Form doesn't have "date", set it from timestamp if possible
-        if not norm.get("date") and timestamp:
-            # keep as raw string (PDF just prints it). If you want strict formatting later, adjust here.
-            norm["date"] = timestamp
-
-        # Carry timestamp into system column
-        if not norm.get("submission_timestamp") and timestamp:
-            norm["submission_timestamp"] = timestamp
-
-        # Build PDF
-        pdf_bytes = build_pdf_bytes("Customer Complaint Form", norm)
-
-        safe_id = safe_filename(f"MSF-{submission_id}")
-        pdf_path = out_dir / f"complaint_{safe_id}.pdf"
-        pdf_path.write_bytes(pdf_bytes)
-
-        meta_path = out_dir / f"complaint_{safe_id}.json"
-        meta_path.write_text(
-            json.dumps(
-                {
-                    "source": "msforms_excel_poll",
-                    "submission_id": submission_id,
-                    "row_index": row_index,
-                    "timestamp": timestamp,
-                    "fields": norm,
-                },
-                indent=2,
-            ),
-            encoding="utf-8",
-        )
-
-        # Upload to SharePoint
-        y, m, d = iso_date_parts(norm.get("submission_timestamp", "") or timestamp or "")
-        remote_folder = f"{sp_folder}/Submissions/{y}/{m}/{d}"
-
-        uploaded_pdf = upload_file_put_content(token, upload_drive_id, pdf_path, remote_folder, content_type="application/pdf")
-        uploaded_json = upload_file_put_content(token, upload_drive_id, meta_path, remote_folder, content_type="application/json")
-
-        # Email (optional)
-        if sender_upn and notify_to:
-            subject = f"New complaint submission: MSF-{submission_id}"
-            body = "\n".join(
-                [
-                    "A new complaint was submitted via Microsoft Forms.",
-                    f"Submission id: MSF-{submission_id}",
-                    f"Timestamp: {timestamp}",
-                    f"Uploaded PDF driveItem id: {uploaded_pdf.get('id', 'n/a')}",
-                    f"Uploaded JSON driveItem id: {uploaded_json.get('id', 'n/a')}",
-                ]
-            )
-            # Attach PDF + JSON locally
-            send_mail_with_attachments(
-                token=token,
-                sender_upn=sender_upn,
-                to_emails=notify_to,
-                subject=subject,
-                body_text=body,
-                attachments=[pdf_path, meta_path],
-            )
-
-        # Mark row as processed
-        if processed_idx < len(values):
-            values[processed_idx] = "Yes"
-        else:
-            # pad if somehow shorter
-            values.extend([""] * (processed_idx - len(values) + 1))
-            values[processed_idx] = "Yes"
-
-        _update_row_values(token, wb_base, msform_table_name, row_index, values)
-
-        processed_count += 1
-        log.info("Processed row index=%s submission_id=%s", row_index, submission_id)
-
+    done: List[_PendingRow] = []
+    failures: List[str] = []
+    errors: List[BaseException] = []
+    flushes: List[Future] = []
+
+    layout = _column_layout(cols)
+    prepare = partial(_prepare_row, layout=layout, processed_idx=processed_idx, out_dir=out_dir, sp_folder=sp_folder)
+
+    # PDF builds and $batch uploads are independent per row, so overlap them;
+    # Graph throttling (429) is still handled by the session retries. ex.map
+    # queues every prepare up front, so uploads get their own pool and start as
+    # soon as a group is ready; emails likewise never wait behind uploads.
+    workers = _poll_workers()
+    with ThreadPoolExecutor(max_workers=MAIL_WORKERS) as mail_ex, ThreadPoolExecutor(
+        max_workers=workers
+    ) as upload_ex, ThreadPoolExecutor(max_workers=workers) as ex:
+        mail = _MailQueue(token, sender_upn, notify_to, mail_ex) if sender_upn and notify_to else None
+
+        try:
+            todo = (r for r in rows if _needs_processing(r, processed_idx))
+            for group in _batches(ex.map(prepare, todo)):
+                flushes.append(upload_ex.submit(_flush_pending, token, upload_drive_id, group, mail))
+        finally:
+            for f in flushes:
+                try:
+                    ok, bad = f.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                done.extend(ok)
+                failures.extend(bad)
+
+            # One PATCH for every uploaded row, even if another batch failed
+            _mark_processed(token, wb_base, msform_table_name, cols[processed_idx], done)
+
+    if mail:
+        mail.wait()
+
+    if errors:
+        raise errors[0]
+    if failures:
+        raise RuntimeError("Graph batch failed for " + "; ".join(failures))
+
+    processed_count = len(done)
     log.info("MS Forms poll finished. processed_count=%s", processed_count)
     return 0
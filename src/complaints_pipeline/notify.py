@@ -4,17 +4,30 @@ import base64
 from pathlib import Path
 from typing import Iterable, List, Optional
 
-from .graph import session_with_retries
+import orjson
+
+from .graph import shared_session
+
+# Must be a multiple of 3 so chunks encode without intermediate padding.
+_B64_READ_CHUNK = 3 * 65536
 
 
 def _file_attachment(path: Path) -> dict:
-    content_bytes = path.read_bytes()
-    content_b64 = base64.b64encode(content_bytes).decode("ascii")
+    # Encode chunk by chunk into one pre-sized buffer instead of holding the
+    # raw file, its base64 bytes and the final str all at once.
+    size = path.stat().st_size
+    buf = bytearray(((size + 2) // 3) * 4)
+    off = 0
+    with path.open("rb", buffering=1 << 20) as f:
+        while chunk := f.read(_B64_READ_CHUNK):
+            enc = base64.b64encode(chunk)
+            buf[off : off + len(enc)] = enc
+            off += len(enc)
     return {
         "@odata.type": "#microsoft.graph.fileAttachment",
         "name": path.name,
         "contentType": "application/octet-stream",
-        "contentBytes": content_b64,
+        "contentBytes": buf[:off].decode("ascii"),
     }
 
 
@@ -44,11 +57,11 @@ def send_mail_with_attachments(
         "saveToSentItems": bool(save_to_sent_items),
     }
 
-    s = session_with_retries()
+    s = shared_session()
     r = s.post(
         url,
         headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        json=payload,
+        data=orjson.dumps(payload),
         timeout=60,
     )
     r.raise_for_status()
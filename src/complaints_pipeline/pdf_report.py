@@ -1,57 +1,69 @@
 from __future__ import annotations
 
 from io import BytesIO
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Tuple, Union
+from xml.sax.saxutils import escape
 
 from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer
 
 from .schema import PDF_SECTIONS
 
+# Built once per process; per PDF only the field values are escaped.
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = _STYLES["Title"]
+_SECTION_STYLE = _STYLES["Heading2"]
+_FIELD_STYLE = _STYLES["BodyText"]
+
+# (section title markup, ((key, label markup), ...)) in QAF-12-01 order
+_SECTIONS_PRE: List[Tuple[str, Tuple[Tuple[str, str], ...]]] = [
+    (escape(title), tuple((k, f"<b>{escape(k)}</b>: ") for k in keys))
+    for title, keys in PDF_SECTIONS
+]
+
+
+def _value_markup(value: Any) -> str:
+    # Paragraph text is mini-XML: escape values and keep their line breaks
+    return escape(str(value)).replace("\n", "<br/>")
+
+
+def _story(title: str, fields: Dict[str, Any]) -> List[Flowable]:
+    story: List[Flowable] = [Paragraph(escape(title), _TITLE_STYLE)]
+    for section_markup, labels in _SECTIONS_PRE:
+        story.append(Paragraph(section_markup, _SECTION_STYLE))
+        story.extend(
+            Paragraph(label + _value_markup(fields.get(k, "")), _FIELD_STYLE) for k, label in labels
+        )
+        story.append(Spacer(1, 10))
+    return story
+
+
+def _build(target: Union[BinaryIO, BytesIO], title: str, fields: Dict[str, Any]) -> None:
+    # Platypus wraps each paragraph once and paginates for us
+    doc = SimpleDocTemplate(
+        target,
+        pagesize=A4,
+        title=title,
+        leftMargin=50,
+        rightMargin=50,
+        topMargin=50,
+        bottomMargin=60,
+    )
+    doc.build(_story(title, fields))
+
+
+def build_pdf_to_path(path: Path, title: str, fields: Dict[str, Any]) -> Path:
+    """Write the QAF-12-01 (rev 04) PDF straight to ``path`` without an in-memory copy."""
+    path = Path(path)
+    with open(path, "wb", buffering=1 << 16) as f:
+        _build(f, title, fields)
+    return path
+
 
 def build_pdf_bytes(title: str, fields: Dict[str, Any]) -> bytes:
     """Generate a PDF in the same section order as QAF-12-01 (rev 04)."""
     buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-
-    c.setTitle(title)
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, height - 50, title)
-
-    y = height - 80
-
-    def new_line(pad=14):
-        nonlocal y
-        y -= pad
-        if y < 60:
-            c.showPage()
-            y = height - 60
-
-    def draw_text(text: str, font="Helvetica", size=11):
-        nonlocal y
-        c.setFont(font, size)
-        # Wrap naive by char count
-        max_chars = 105
-        line = str(text)
-        while len(line) > max_chars:
-            c.drawString(50, y, line[:max_chars])
-            new_line()
-            line = "    " + line[max_chars:]
-        c.drawString(50, y, line)
-        new_line()
-
-    for section_title, keys in PDF_SECTIONS:
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y, section_title)
-        new_line(18)
-
-        for k in keys:
-            val = fields.get(k, "")
-            draw_text(f"{k}: {val}")
-
-        new_line(10)
-
-    c.showPage()
-    c.save()
+    _build(buf, title, fields)
     return buf.getvalue()
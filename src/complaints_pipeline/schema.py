@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, Tuple
 
 # QAF-12-01 (rev 04) aligned header order.
 # We add a technical column at the end for tracing/idempotency.
-SHEET_COLUMNS: List[str] = [
+SHEET_COLUMNS: Tuple[str, ...] = (
     "date",
     "complaint_received_by",
     "first_name",
@@ -30,76 +32,118 @@ SHEET_COLUMNS: List[str] = [
     "complaint_no",
     "date_received_at_qa",
     "submission_timestamp",
-]
+)
+SHEET_COLUMNS_SET: FrozenSet[str] = frozenset(SHEET_COLUMNS)
+SHEET_COLUMNS_INDEX: Dict[str, int] = {c: i for i, c in enumerate(SHEET_COLUMNS)}
+# The CSV backup header line; snake_case names never need quoting
+SHEET_COLUMNS_CSV_HEADER: bytes = (",".join(SHEET_COLUMNS) + "\n").encode("utf-8")
 
 # PDF layout sections: (title, keys)
-PDF_SECTIONS: List[Tuple[str, List[str]]] = [
-    ("Customer Complaint Form", ["date", "complaint_received_by"]),
+PDF_SECTIONS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("Customer Complaint Form", ("date", "complaint_received_by")),
     (
         "Contact Information / Complainant Details",
-        ["first_name", "last_name", "phone_no", "email_address", "address"],
+        ("first_name", "last_name", "phone_no", "email_address", "address"),
     ),
     (
         "Product Details",
-        [
+        (
             "product_name",
             "product_size",
             "lot_serial_no",
             "quantity",
             "purchased_from_distributor",
             "country",
-        ],
+        ),
     ),
-    ("Complaint", ["complaint_description"]),
+    ("Complaint", ("complaint_description",)),
     (
         "Complaint Evaluation",
-        [
+        (
             "complaint_evaluation_level",
             "report_to_authorities",
             "used_on_patient",
             "cleaned_before_sending_back_to_rn",
             "system_kind",
-        ],
+        ),
     ),
-    ("Additional Information", ["primary_solution", "comments"]),
-    ("QA Manager", ["complaint_no", "date_received_at_qa"]),
-    ("System", ["submission_timestamp"]),
-]
+    ("Additional Information", ("primary_solution", "comments")),
+    ("QA Manager", ("complaint_no", "date_received_at_qa")),
+    ("System", ("submission_timestamp",)),
+)
+PDF_SECTION_KEYS: FrozenSet[str] = frozenset(k for _, ks in PDF_SECTIONS for k in ks)
+# key -> index of its section in PDF_SECTIONS
+PDF_KEY_SECTION: Dict[str, int] = {k: i for i, (_, ks) in enumerate(PDF_SECTIONS) for k in ks}
 
-# Mapping from possible Google Form question strings -> normalized keys.
+# Checked at import (not with assert, so it survives python -O)
+if not PDF_SECTION_KEYS <= SHEET_COLUMNS_SET:
+    raise RuntimeError(f"PDF sections reference unknown keys: {sorted(PDF_SECTION_KEYS - SHEET_COLUMNS_SET)}")
+
+# Mapping from Google Form question titles -> normalized keys, keyed by
+# canonical_question() so spelling variants share one entry.
 # Python side mapping is a safety belt; Apps Script should already normalize.
 QUESTION_MAP: Dict[str, str] = {
     "date": "date",
     "complaint received by": "complaint_received_by",
     "first name": "first_name",
     "last name": "last_name",
-    "phone number": "phone_no",
     "phone no": "phone_no",
     "email address": "email_address",
     "address": "address",
     "product name": "product_name",
     "product size": "product_size",
-    "lot / serial number": "lot_serial_no",
-    "lot / serial no": "lot_serial_no",
-    "lot/serial no": "lot_serial_no",
+    "lot serial no": "lot_serial_no",
     "quantity": "quantity",
-    "purchased from (distributer)": "purchased_from_distributor",
     "purchased from (distributor)": "purchased_from_distributor",
     "country": "country",
     "complaint description": "complaint_description",
     "complaint type": "complaint_evaluation_level",
-    "should this complaint be reported to authorities ?": "report_to_authorities",
+    "should this complaint be reported to authorities?": "report_to_authorities",
     "was the device used on a patient?": "used_on_patient",
     "was the device cleaned before sending back to rn?": "cleaned_before_sending_back_to_rn",
     "what kind of system is this?": "system_kind",
     "primary solution (if provided)": "primary_solution",
     "comments (if applicable)": "comments",
-    "complaint no.": "complaint_no",
     "complaint no": "complaint_no",
     "date complaint received at qa": "date_received_at_qa",
     "timestamp": "submission_timestamp",
     "submission_timestamp": "submission_timestamp",
 }
 
+# Applied in order to a normalized question to fold known spelling variants
+_CANON_SUBS: Tuple[Tuple[str, str], ...] = (
+    ("/", " "),
+    (".", ""),
+    (" ?", "?"),
+    ("distributer", "distributor"),
+    ("number", "no"),
+)
+
+# Every character str.split() treats as whitespace -> " " (none lie above U+3000)
+_WS_TRANS = str.maketrans({c: " " for c in map(chr, range(0x3001)) if c.isspace()})
+_MULTI_SP = re.compile(r" {2,}")
+
+
+@lru_cache(maxsize=1024)
 def normalize_question(q: str) -> str:
-    return " ".join(q.strip().lower().split())
+    s = q.strip().lower()
+    # isprintable() is False for every whitespace character except " ", so
+    # this only skips the rewrite when it would be a no-op
+    if "  " not in s and s.isprintable():
+        return s
+    return _MULTI_SP.sub(" ", s.translate(_WS_TRANS))
+
+
+@lru_cache(maxsize=1024)
+def canonical_question(q: str) -> str:
+    """normalize_question() plus folding of the variants in _CANON_SUBS."""
+    s = normalize_question(q)
+    for a, b in _CANON_SUBS:
+        if a in s:
+            s = s.replace(a, b)
+    return " ".join(s.split()) if "  " in s else s.strip()
+
+
+# QUESTION_MAP with keys run through canonical_question once at import, so
+# lookups only canonicalize the incoming question.
+NORMALIZED_QUESTION_MAP: Dict[str, str] = {canonical_question(k): v for k, v in QUESTION_MAP.items()}
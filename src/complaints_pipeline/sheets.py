@@ -1,57 +1,225 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import itertools
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
 
 from .schema import SHEET_COLUMNS
 
 DEFAULT_WORKSHEET = "Complaints"
 
+# Sheets API sheet ids are int32
+SHEET_ID_LIMIT = 2**31
+
+
+# Reused for the life of the process; building a client or opening a
+# spreadsheet costs an auth exchange / metadata fetch each time
+_CLIENT_CACHE: Dict[str, Any] = {}
+_SS_CACHE: Dict[Tuple[Any, str], Any] = {}
+
 
 def auth_sheets(service_account_json_path: str):
+    gc = _CLIENT_CACHE.get(service_account_json_path)
+    if gc is not None:
+        return gc
+
     import gspread
     from google.oauth2.service_account import Credentials
 
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     creds = Credentials.from_service_account_file(service_account_json_path, scopes=scopes)
-    return gspread.authorize(creds)
+    gc = _CLIENT_CACHE[service_account_json_path] = gspread.authorize(creds)
+    return gc
 
 
 def open_spreadsheet(gc, sheet_id: str):
-    return gc.open_by_key(sheet_id)
+    # Keyed by the client itself (not id(gc)) so a collected client's id
+    # can never be reused for a stale entry
+    key = (gc, sheet_id)
+    sh = _SS_CACHE.get(key)
+    if sh is None:
+        sh = _SS_CACHE[key] = gc.open_by_key(sheet_id)
+    return sh
 
 
 def get_or_create_worksheet(sh, worksheet_name: str = DEFAULT_WORKSHEET):
-    try:
-        return sh.worksheet(worksheet_name)
-    except Exception:
-        # Create with a reasonable default column count
-        ws = sh.add_worksheet(title=worksheet_name, rows=2000, cols=max(30, len(SHEET_COLUMNS) + 5))
-        return ws
+    worksheets = sh.worksheets()
+    for ws in worksheets:
+        if ws.title == worksheet_name:
+            return ws
+    return create_worksheet_with_header(sh, worksheet_name, taken_ids=[ws.id for ws in worksheets])
+
 
+def create_worksheet_with_header(sh, worksheet_name: str, *, taken_ids: Iterable[int] = ()):
+    """Add a worksheet and write the SHEET_COLUMNS header in one batchUpdate.
+
+    updateCells needs the new sheet's id, so it is picked up front rather than
+    left to the server; ``taken_ids`` are the ids already in the spreadsheet.
+    """
+    from gspread.worksheet import Worksheet
+
+    # sheetId is an int32; server-assigned ids are often large, so max() + 1
+    # can overflow and the lowest free id is used instead
+    taken = set(taken_ids)
+    sheet_id = max(taken, default=0) + 1
+    if sheet_id >= SHEET_ID_LIMIT:
+        sheet_id = next(i for i in itertools.count(1) if i not in taken)
+    body = {
+        "requests": [
+            {
+                "addSheet": {
+                    "properties": {
+                        "sheetId": sheet_id,
+                        "title": worksheet_name,
+                        "sheetType": "GRID",
+                        # Create with a reasonable default column count
+                        "gridProperties": {
+                            "rowCount": 2000,
+                            "columnCount": max(30, len(SHEET_COLUMNS) + 5),
+                        },
+                    }
+                }
+            },
+            {
+                "updateCells": {
+                    "rows": [
+                        {
+                            "values": [
+                                {"userEnteredValue": {"stringValue": c}} for c in SHEET_COLUMNS
+                            ]
+                        }
+                    ],
+                    "fields": "userEnteredValue",
+                    "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                }
+            },
+        ]
+    }
+    data = sh.batch_update(body)
+    ws = Worksheet(sh, data["replies"][0]["addSheet"]["properties"], sh.id, sh.client)
+    _HEADER_OK.add(_header_key(ws))
+    return ws
+
+
+# (spreadsheet id, worksheet title) pairs whose header already matched
+_HEADER_OK: Set[Tuple[str, str]] = set()
+
+
+@lru_cache(maxsize=64)
+def _col_letter(n: int) -> str:
+    # 1 -> A, 26 -> Z, 27 -> AA
+    out = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        out = chr(65 + r) + out
+    return out
+
+
+def _header_key(ws) -> Tuple[str, str]:
+    return (getattr(ws.spreadsheet, "id", ""), ws.title)
+
+
+def _check_header(ws, header: List, *, strict: bool) -> None:
+    key = _header_key(ws)
+
+    if not any(c and str(c).strip() for c in header):
+        from gspread.utils import absolute_range_name
+
+        # One RAW values.update: nothing in the header needs formula parsing
+        ws.spreadsheet.values_update(
+            absolute_range_name(ws.title, "A1"),
+            params={"valueInputOption": "RAW"},
+            body={"values": [list(SHEET_COLUMNS)]},
+        )
+        _HEADER_OK.add(key)
+        return
 
-def ensure_header(ws, *, strict: bool = True) -> None:
+    expected = SHEET_COLUMNS
+    n = len(header)
+    # Machine-written headers are already clean, so try an exact match before
+    # the strip; stop at the first column that differs either way.
+    bad = next(
+        (
+            i
+            for i, want in enumerate(expected)
+            if i >= n or (header[i] != want and str(header[i]).strip() != want)
+        ),
+        None,
+    )
+    if bad is None:
+        _HEADER_OK.add(key)
+    elif strict:
+        got = str(header[bad]).strip() if bad < n else ""
+        raise RuntimeError(
+            "Worksheet header does not match expected QAF schema. "
+            f"Column {_col_letter(bad + 1)} (index {bad}): expected {expected[bad]!r}, "
+            f"got {got!r}. Expected first {len(expected)} columns: {list(expected)}."
+        )
+
+
+def ensure_header(ws, *, strict: bool = True, force: bool = False) -> None:
     """Ensure header exists and matches expected QAF schema order.
 
     - If empty sheet: writes SHEET_COLUMNS as header.
     - If non-empty:
         - strict=True: raise if mismatch
         - strict=False: do nothing (best-effort)
-    """
-    header = ws.row_values(1)
 
-    if not header or all(not str(x).strip() for x in header):
-        ws.update("A1", [SHEET_COLUMNS])
+    A verified header is remembered per worksheet for the rest of the process;
+    pass force=True to check again.
+    """
+    if _header_key(ws) in _HEADER_OK and not force:
         return
+    _check_header(ws, ws.row_values(1), strict=strict)
 
-    expected = SHEET_COLUMNS
-    got = [str(x).strip() for x in header[: len(expected)]]
-    if got != expected and strict:
-        raise RuntimeError(
-            "Worksheet header does not match expected QAF schema. "
-            f"Expected first {len(expected)} columns: {expected}. Got: {got}."
-        )
+
+def _fetch_complaints(ws, *, strict_header: bool) -> Tuple[List[str], List[List]]:
+    # One values request covers both the header check and the data
+    width = len(SHEET_COLUMNS)
+    data = ws.get_values(f"A1:{_col_letter(width)}")
+    header = data[0] if data else []
+    _check_header(ws, header, strict=strict_header)
+
+    # Key by the sheet's own header so a tolerated (non-strict) mismatch still
+    # lines values up with their column names; strict mode means they match.
+    keys = [str(x).strip() for x in header] if header else list(SHEET_COLUMNS)
+    keys += [""] * (width - len(keys))
+    return keys, data[1:]
+
+
+def _dict_rows(keys: List[str], rows: List[List]) -> Iterator[Dict]:
+    width = len(keys)
+    # Pop from the end of a reversed list so each fetched row is released as
+    # soon as its dict has been handed out
+    rows.reverse()
+    while rows:
+        r = rows.pop()
+        yield dict(zip(keys, r + [""] * (width - len(r))))
+
+
+def iter_complaints(ws, *, strict_header: bool = True) -> Iterator[Dict]:
+    """Yield complaint rows one at a time.
+
+    The sheet is read eagerly, so errors surface before the caller starts
+    writing output; the per-row dicts are built lazily.
+    """
+    keys, rows = _fetch_complaints(ws, strict_header=strict_header)
+    return _dict_rows(keys, rows)
 
 
 def read_all_complaints(ws, *, strict_header: bool = True) -> List[Dict]:
-    ensure_header(ws, strict=strict_header)
-    return ws.get_all_records(expected_headers=SHEET_COLUMNS)
+    return list(iter_complaints(ws, strict_header=strict_header))
+
+
+def read_all_complaints_rows(ws, *, strict_header: bool = True) -> Tuple[List[str], List[List]]:
+    """Return ``(header, rows)`` with every row padded to the header width.
+
+    For writers that want plain lists (the CSV backup) rather than one dict
+    per row.
+    """
+    keys, rows = _fetch_complaints(ws, strict_header=strict_header)
+    width = len(keys)
+    for r in rows:
+        if len(r) < width:
+            r.extend([""] * (width - len(r)))
+    return keys, rows
@@ -1,27 +1,46 @@
 from __future__ import annotations
 
 import re
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Tuple
 
 
 def utc_ts() -> str:
-    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    # f-string int formatting avoids re-parsing a strftime format per call
+    dt = datetime.now(timezone.utc)
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
+# "_" is deliberately not allowed so runs of "_" and other disallowed
+# characters collapse into a single "_" in one pass.
+_SAFE_RE = re.compile(r"[^A-Za-z0-9.-]+")
 
 
 def safe_filename(name: str, max_len: int = 120) -> str:
-    name = name.strip()
-    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
-    name = re.sub(r"_+", "_", name).strip("_")
+    name = _SAFE_RE.sub("_", name.strip()).strip("_")
     if not name:
         name = "file"
     return name[:max_len]
 
 
+# Explicitly-UTC ISO-8601 timestamps (what Forms sends): the UTC date is
+# simply the first 10 characters. Date-only and other offsets take the full
+# parse, which converts them to UTC.
+_ISO_UTC_FAST = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]00:?00)")
+
+
 def iso_date_parts(ts: str) -> Tuple[str, str, str]:
+    if _ISO_UTC_FAST.fullmatch(ts):
+        try:
+            # Impossible dates (2025-02-30) fall through to the full parse
+            date(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]))
+        except ValueError:
+            pass
+        else:
+            return (ts[0:4], ts[5:7], ts[8:10])
     try:
         dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
     except Exception:
         dt = datetime.now(timezone.utc)
     dt = dt.astimezone(timezone.utc)
-    return (dt.strftime("%Y"), dt.strftime("%m"), dt.strftime("%d"))
+    return (f"{dt.year:04d}", f"{dt.month:02d}", f"{dt.day:02d}")
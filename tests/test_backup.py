@@ -1,19 +1,71 @@
+import csv
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from complaints_pipeline.backup import backup_to_csv
+from complaints_pipeline.schema import SHEET_COLUMNS
+
+
+def _rows(*records):
+    header = list(SHEET_COLUMNS)
+    return header, [[r.get(c, "") for c in header] for r in records]
 
 
 def test_backup_to_csv_writes_header_and_rows(tmp_path: Path):
     fake_ws = object()
-    rows = [
+    data = _rows(
         {"first_name": "A", "last_name": "B", "complaint_description": "X"},
         {"first_name": "C", "last_name": "D", "complaint_description": "Y"},
-    ]
-    with patch("complaints_pipeline.backup.read_all_complaints", return_value=rows):
+    )
+    with patch("complaints_pipeline.backup.read_all_complaints_rows", return_value=data):
         out = backup_to_csv(fake_ws, out_dir=str(tmp_path))
 
     text = out.read_text(encoding="utf-8")
     assert "first_name" in text
     assert "complaint_description" in text
     assert "X" in text and "Y" in text
+
+
+def test_backup_to_csv_keeps_schema_column_order(tmp_path: Path):
+    data = _rows({"last_name": "B", "first_name": "A"})
+    with patch("complaints_pipeline.backup.read_all_complaints_rows", return_value=data):
+        out = backup_to_csv(object(), out_dir=str(tmp_path))
+
+    with out.open(newline="", encoding="utf-8") as f:
+        header, row = list(csv.reader(f))
+    assert header == list(SHEET_COLUMNS)
+    assert row[header.index("first_name")] == "A"
+    assert row[header.index("last_name")] == "B"
+
+
+def test_backup_to_csv_stdlib_fallback(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("complaints_pipeline.backup.pacsv", None)
+    data = _rows({"first_name": "A", "quantity": 3, "comments": 'say "hi", ok'})
+    with patch("complaints_pipeline.backup.read_all_complaints_rows", return_value=data):
+        out = backup_to_csv(object(), out_dir=str(tmp_path))
+
+    raw = out.read_bytes()
+    assert raw.startswith(b"date,complaint_received_by,")
+    assert b'"say ""hi"", ok"' in raw
+    assert b"\r\n" not in raw
+
+
+def test_arrow_and_stdlib_writers_parse_identically(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    from complaints_pipeline.backup import _write_csv_arrow, _write_csv_stdlib
+
+    header, rows = _rows(
+        {"first_name": 'Å, "quoted"', "comments": "line 1\nline 2", "quantity": 3},
+        {"address": "", "country": " padded "},
+    )
+    out = {}
+    for name, writer in (("arrow", _write_csv_arrow), ("stdlib", _write_csv_stdlib)):
+        path = tmp_path / f"{name}.csv"
+        writer(path, header, [list(r) for r in rows])
+        with path.open(newline="", encoding="utf-8") as f:
+            out[name] = list(csv.reader(f))
+
+    assert out["arrow"] == out["stdlib"]
+    assert out["stdlib"][0] == list(SHEET_COLUMNS)
@@ -28,3 +28,18 @@ def test_backup_without_sp_or_email_does_not_call_graph(monkeypatch, tmp_path):
         rc = main()
         assert rc == 0
         get_token.assert_not_called()
+
+def test_dispatch_loads_graph_env_once(monkeypatch, tmp_path):
+    event = tmp_path / "event.json"
+    event.write_text('{"client_payload": {"submission_id": "S1", "fields": {"first_name": "A"}}}')
+    monkeypatch.setenv("BACKUP_DIR", str(tmp_path))
+    monkeypatch.setattr("sys.argv", ["prog", "dispatch", "--event-path", str(event), "--sp-upload"])
+
+    with patch("complaints_pipeline.cli.load_graph_env") as env, patch(
+        "complaints_pipeline.cli.get_token", return_value="T"
+    ), patch("complaints_pipeline.cli.get_site_id"), patch(
+        "complaints_pipeline.cli.get_default_drive_id"
+    ), patch("complaints_pipeline.cli.upload_file_put_content", return_value={"id": "X"}):
+        env.return_value.folder = "Complaints"
+        assert main() == 0
+        env.assert_called_once()
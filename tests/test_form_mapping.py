@@ -1,4 +1,5 @@
-from complaints_pipeline.form_mapping import normalize_fields
+from complaints_pipeline.form_mapping import build_key_translator, normalize_fields
+from complaints_pipeline.schema import SHEET_COLUMNS
 
 
 def test_normalize_fields_maps_question_titles():
@@ -13,3 +14,18 @@ def test_normalize_fields_maps_question_titles():
     assert out["last_name"] == "Lovelace"
     assert out["complaint_description"] == "X"
     assert out["submission_timestamp"] == "2025-01-01T00:00:00Z"
+
+
+def test_translator_matches_default_normalization():
+    raw = {"First Name": "Ada", "product_name": "P", "Unknown question": "?", "Timestamp": "T"}
+    translator = build_key_translator(raw)
+    assert "Unknown question" not in translator
+    assert normalize_fields(raw, translator) == normalize_fields(raw)
+
+
+def test_schema_keyed_payload_keeps_all_columns():
+    out = normalize_fields({"first_name": "Ada", "date": "2025-01-01"})
+    assert out["first_name"] == "Ada"
+    assert out["date"] == "2025-01-01"
+    assert out["last_name"] == ""
+    assert list(out) == list(SHEET_COLUMNS)
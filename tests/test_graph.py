@@ -1,5 +1,156 @@
-from complaints_pipeline.graph import encode_graph_path
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import orjson
+
+from complaints_pipeline import graph
+from complaints_pipeline.graph import GraphApp, encode_graph_path, get_token
 
 
 def test_encode_graph_path():
     assert encode_graph_path("Backups/Complaints", "a b.csv").endswith("a%20b.csv")
+    assert encode_graph_path("/Q&A/Säkerhet/", "x#1.pdf") == "Q%26A/S%C3%A4kerhet/x%231.pdf"
+    assert encode_graph_path("", "a.csv") == "a.csv"
+    assert encode_graph_path("A", "x/y.pdf") == "A/x%2Fy.pdf"
+
+
+def test_get_token_reuses_cached_token(monkeypatch, tmp_path):
+    monkeypatch.setenv("COMPLAINTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(graph, "_TOKEN_CACHE", {})
+
+    cca = MagicMock()
+    cca.acquire_token_for_client.return_value = {"access_token": "T", "expires_in": 3600}
+    token_cache = MagicMock(has_state_changed=False)
+    fake_msal = SimpleNamespace(
+        ConfidentialClientApplication=MagicMock(return_value=cca),
+        SerializableTokenCache=MagicMock(return_value=token_cache),
+    )
+    monkeypatch.setitem(sys.modules, "msal", fake_msal)
+
+    app = GraphApp("tenant", "client", "secret")
+    assert get_token(app) == "T"
+    assert get_token(app) == "T"
+    cca.acquire_token_for_client.assert_called_once()
+
+
+def test_save_msal_cache_tightens_existing_file_mode(tmp_path):
+    path = tmp_path / "msal_cache.bin"
+    path.write_text("old", encoding="utf-8")
+    path.chmod(0o644)
+    cache = MagicMock(has_state_changed=True)
+    cache.serialize.return_value = "new"
+
+    graph._save_msal_cache(cache, path)
+
+    assert path.read_text(encoding="utf-8") == "new"
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_graph_batch_resends_throttled_requests(monkeypatch):
+    first = {
+        "responses": [
+            {"id": "0-pdf", "status": 429, "headers": {"Retry-After": "0"}},
+            {"id": "0-json", "status": 201, "body": {"id": "J"}},
+            {"id": "1-pdf", "status": 201, "body": {"id": "B"}},
+        ]
+    }
+    second = {"responses": [{"id": "0-pdf", "status": 201, "body": {"id": "A"}}]}
+    session = MagicMock()
+    session.post.side_effect = [
+        MagicMock(content=orjson.dumps(first)),
+        MagicMock(content=orjson.dumps(second)),
+    ]
+    monkeypatch.setattr(graph, "shared_session", lambda: session)
+
+    entries = [
+        {"id": "0-pdf", "method": "PUT", "url": "/a"},
+        {"id": "0-json", "method": "PUT", "url": "/b"},
+        {"id": "1-pdf", "method": "PUT", "url": "/c"},
+    ]
+    out = graph.graph_batch("T", entries)
+
+    assert {k: v["status"] for k, v in out.items()} == {"0-pdf": 201, "0-json": 201, "1-pdf": 201}
+    assert out["0-pdf"]["body"] == {"id": "A"}
+    resent = orjson.loads(session.post.call_args_list[1].kwargs["data"])["requests"]
+    assert [e["id"] for e in resent] == ["0-pdf"]
+
+
+def test_shared_session_is_reused(monkeypatch):
+    monkeypatch.setattr(graph, "_SESSION", None)
+    assert graph.shared_session() is graph.shared_session()
+
+
+def test_upload_switches_to_upload_session_for_large_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(graph, "SIMPLE_UPLOAD_MAX_BYTES", 10)
+    monkeypatch.setattr(graph, "UPLOAD_CHUNK_BYTES", 8)
+    local = tmp_path / "big.csv"
+    local.write_bytes(b"x" * 20)
+
+    session = MagicMock()
+    session.post.return_value = MagicMock(content=orjson.dumps({"uploadUrl": "https://up"}))
+    session.put.return_value = MagicMock(content=orjson.dumps({"id": "ITEM"}))
+    monkeypatch.setattr(graph, "shared_session", lambda: session)
+
+    item = graph.upload_file_put_content("T", "D", local, "Backups")
+
+    assert item == {"id": "ITEM"}
+    ranges = [c.kwargs["headers"]["Content-Range"] for c in session.put.call_args_list]
+    assert ranges == ["bytes 0-7/20", "bytes 8-15/20", "bytes 16-19/20"]
+
+
+def test_upload_sends_only_the_stat_size_of_a_growing_file(monkeypatch, tmp_path):
+    local = tmp_path / "run.log"
+    local.write_bytes(b"a" * 20)
+    session = MagicMock()
+    session.put.return_value = MagicMock(status_code=201, content=orjson.dumps({"id": "ITEM"}))
+    monkeypatch.setattr(graph, "shared_session", lambda: session)
+
+    graph.upload_file_put_content("T", "D", local, "Logs")
+    assert session.put.call_args.kwargs["data"] == b"a" * 20
+
+    # Bytes appended after the size was taken are never sent
+    session.put.reset_mock()
+    session.post.return_value = MagicMock(content=orjson.dumps({"uploadUrl": "https://up"}))
+    monkeypatch.setattr(graph, "UPLOAD_CHUNK_BYTES", 8)
+    local.write_bytes(b"a" * 20 + b"WARNING Retrying")
+    graph._upload_large_file("T", "D", local, "Logs/run.log", 20)
+    sent = b"".join(c.kwargs["data"] for c in session.put.call_args_list)
+    assert sent == b"a" * 20
+
+
+def test_site_and_drive_ids_are_cached_on_disk(monkeypatch, tmp_path):
+    monkeypatch.setenv("COMPLAINTS_CACHE_DIR", str(tmp_path))
+    session = MagicMock()
+    session.get.side_effect = [
+        MagicMock(status_code=200, content=orjson.dumps({"id": "SITE"})),
+        MagicMock(status_code=200, content=orjson.dumps({"id": "DRIVE"})),
+    ]
+    monkeypatch.setattr(graph, "shared_session", lambda: session)
+
+    for _ in range(2):
+        site_id = graph.get_site_id("T", "tenant.sharepoint.com", "/sites/Quality")
+        assert graph.get_default_drive_id("T", site_id) == "DRIVE"
+    assert session.get.call_count == 2
+
+    graph.forget_cached_id("DRIVE")
+    assert "DRIVE" not in (tmp_path / "site_cache.json").read_text(encoding="utf-8")
+
+
+def test_upload_put_content_request_inlines_body_by_content_type(tmp_path):
+    local = tmp_path / "a b.json"
+    local.write_bytes(b'{"k": [1]}')
+    entry = graph.upload_put_content_request(
+        "0-json", "drv", local, "Sub/2025", content_type="application/json"
+    )
+    assert entry["url"] == "/drives/drv/root:/Sub/2025/a%20b.json:/content"
+    assert entry["headers"] == {"Content-Type": "application/json"}
+    # JSON bodies go in as JSON; anything else as base64
+    assert entry["body"] == {"k": [1]}
+
+    pdf = tmp_path / "c.pdf"
+    pdf.write_bytes(b"%PDF")
+    entry = graph.upload_put_content_request(
+        "0-pdf", "drv", pdf, "", content_type="application/pdf"
+    )
+    assert entry["body"] == "JVBERg=="
@@ -0,0 +1,253 @@
+import logging
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from complaints_pipeline import msforms_poll
+from complaints_pipeline.msforms_poll import (
+    _batches,
+    _column_layout,
+    _encode_path,
+    _flush_pending,
+    _iter_table_rows,
+    _MailQueue,
+    _mark_processed,
+    _PendingRow,
+    _prepare_row,
+)
+
+COLS = ["Id", "Start time", "Completion time", "Email", "First Name", "Processed"]
+
+
+def test_encode_path_drops_empty_segments():
+    assert _encode_path("/Forms//Q&A form.xlsx") == "Forms/Q%26A%20form.xlsx"
+
+
+def test_column_layout_separates_form_fields():
+    layout = _column_layout(COLS)
+    assert layout.field_names == ["First Name"]
+    assert layout.field_indices == [4]
+    assert layout.system_idx["id"] == 0
+
+
+def test_prepare_row_skips_processed_and_builds_files(tmp_path: Path):
+    layout = _column_layout(COLS)
+    done = {"index": 0, "values": [["7", "", "", "", "Ada", "Yes"]]}
+    assert _prepare_row(done, layout, 5, tmp_path, "Complaints") is None
+
+    new = {"index": 1, "values": [["8", "", "2025-03-04T05:06:07Z", "", "Ada", ""]]}
+    p = _prepare_row(new, layout, 5, tmp_path, "Complaints")
+    assert p.submission_id == "8"
+    assert p.remote_folder == "Complaints/Submissions/2025/03/04"
+    assert p.values[5] == "Yes"
+    assert p.pdf_path.read_bytes()[:4] == b"%PDF"
+    assert '"first_name": "Ada"' in p.meta_path.read_text(encoding="utf-8")
+
+
+def test_iter_table_rows_pages_until_short_page():
+    pages = [{"value": [{"index": 0}, {"index": 1}]}, {"value": [{"index": 2}]}]
+    with patch("complaints_pipeline.msforms_poll._graph_get", side_effect=pages) as get:
+        rows = list(_iter_table_rows("T", "https://wb", "Table1", page_size=2))
+
+    assert [r["index"] for r in rows] == [0, 1, 2]
+    assert get.call_args_list[1].args[1].endswith("rows?$top=2&$skip=2")
+
+
+def _pending(tmp_path: Path, n: int, pdf_bytes: int = 10) -> _PendingRow:
+    pdf, meta = tmp_path / f"c{n}.pdf", tmp_path / f"c{n}.json"
+    pdf.write_bytes(b"p" * pdf_bytes)
+    meta.write_bytes(b"{}")
+    return _PendingRow(n, str(n), "", pdf, meta, "Complaints/Submissions", ["", "Yes"])
+
+
+def test_flush_pending_keeps_failed_and_missing_rows_unprocessed(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(msforms_poll, "BATCH_INLINE_MAX_BYTES", 100)
+    pending = [
+        _pending(tmp_path, 0),
+        _pending(tmp_path, 1),
+        _pending(tmp_path, 2),
+        _pending(tmp_path, 3, 200),
+    ]
+    responses = {
+        "0-pdf": {"status": 201, "body": {"id": "P0"}},
+        "0-json": {"status": 201, "body": {"id": "J0"}},
+        "1-pdf": {"status": 500},
+        "1-json": {"status": 201, "body": {"id": "J1"}},
+        # row 2 has no sub-responses at all
+        "3-json": {"status": 200, "body": {"id": "J3"}},
+    }
+    mail = MagicMock()
+    with (
+        patch("complaints_pipeline.msforms_poll.graph_batch", return_value=responses) as batch,
+        patch(
+            "complaints_pipeline.msforms_poll.upload_file_put_content", return_value={"id": "P3"}
+        ) as direct,
+    ):
+        done, failures = _flush_pending("T", "drive", pending, mail)
+
+    # Only row 3's PDF is above the inline limit
+    direct.assert_called_once()
+    assert direct.call_args.args[2] == pending[3].pdf_path
+    assert "3-pdf" not in [e["id"] for e in batch.call_args.args[1]]
+
+    assert [p.row_index for p in done] == [0, 3]
+    assert [f.split(" ")[1] for f in failures] == ["index=1", "index=2"]
+    assert "500" in failures[0] and "missing" in failures[1]
+    assert [c.args[1:] for c in mail.submit.call_args_list] == [("P0", "J0"), ("P3", "J3")]
+
+
+def test_flush_pending_forgets_drive_id_on_404(tmp_path: Path):
+    pending = [_pending(tmp_path, 0)]
+    responses = {"0-pdf": {"status": 404}, "0-json": {"status": 201}}
+    with (
+        patch("complaints_pipeline.msforms_poll.graph_batch", return_value=responses),
+        patch("complaints_pipeline.msforms_poll.forget_cached_id") as forget,
+    ):
+        done, failures = _flush_pending("T", "drive", pending, None)
+
+    forget.assert_called_once_with("drive")
+    assert not done and len(failures) == 1
+
+    with (
+        patch("complaints_pipeline.msforms_poll.graph_batch", return_value={}),
+        patch("complaints_pipeline.msforms_poll.forget_cached_id") as forget,
+    ):
+        _flush_pending("T", "drive", pending, None)
+    forget.assert_not_called()
+
+
+def test_batches_close_on_row_count_and_body_size(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(msforms_poll, "ROWS_PER_BATCH", 3)
+    rows = [_pending(tmp_path, n) for n in range(4)]
+    assert [[p.row_index for p in g] for g in _batches([rows[0], None, *rows[1:]])] == [
+        [0, 1, 2],
+        [3],
+    ]
+
+    # Each row inlines (10 + 2) * 4 // 3 bytes; a 30-byte cap fits two of them
+    monkeypatch.setattr(msforms_poll, "BATCH_MAX_BODY_BYTES", 30)
+    assert [[p.row_index for p in g] for g in _batches(rows)] == [[0, 1], [2, 3]]
+
+
+def test_mail_queue_wait_only_logs_failures(tmp_path: Path, caplog):
+    ok, bad = Future(), Future()
+    ok.set_result(None)
+    bad.set_exception(RuntimeError("smtp down"))
+    mail = _MailQueue("T", "sender@x", ["to@x"], MagicMock())
+    mail.futures = [("1", ok), ("2", bad)]
+
+    with caplog.at_level(logging.WARNING, logger="complaints_pipeline.msforms_poll"):
+        mail.wait()
+
+    assert "MSF-2" in caplog.text and "smtp down" in caplog.text
+    assert "MSF-1" not in caplog.text
+
+
+WB = "https://wb"
+COLUMN_URL = f"{WB}/tables/Table1/columns/Processed/dataBodyRange"
+
+
+def test_mark_processed_patches_only_the_touched_rows(tmp_path: Path):
+    done = [_pending(tmp_path, 3), _pending(tmp_path, 1)]
+    current = {"address": "'Form 1'!F2:F7", "values": [["Yes"], [""], ["manual"], [""], [""], [""]]}
+    with (
+        patch("complaints_pipeline.msforms_poll._graph_get", return_value=current) as get,
+        patch("complaints_pipeline.msforms_poll._graph_patch") as patch_,
+    ):
+        _mark_processed("T", WB, "Table1", "Processed", done)
+
+    get.assert_called_once_with("T", COLUMN_URL)
+    patch_.assert_called_once_with(
+        "T",
+        f"{WB}/worksheets/Form%201/range(address='F3:F5')",
+        {"values": [["Yes"], ["manual"], ["Yes"]]},
+    )
+
+
+def test_mark_processed_falls_back_to_per_row_patches(tmp_path: Path):
+    done = [_pending(tmp_path, 0), _pending(tmp_path, 2)]
+    for status in (400, 404):
+        err = requests.HTTPError(response=MagicMock(status_code=status))
+        with (
+            patch("complaints_pipeline.msforms_poll._graph_get", side_effect=err),
+            patch("complaints_pipeline.msforms_poll._graph_patch") as patch_,
+        ):
+            _mark_processed("T", WB, "Table1", "Processed", done)
+
+        assert [c.args[1] for c in patch_.call_args_list] == [
+            f"{WB}/tables/Table1/rows/itemAt(index=0)/range",
+            f"{WB}/tables/Table1/rows/itemAt(index=2)/range",
+        ]
+        assert patch_.call_args_list[0].args[2] == {"values": [["", "Yes"]]}
+
+
+def test_mark_processed_reraises_other_errors(tmp_path: Path):
+    err = requests.HTTPError(response=MagicMock(status_code=500))
+    with (
+        patch("complaints_pipeline.msforms_poll._graph_get", side_effect=err),
+        patch("complaints_pipeline.msforms_poll._graph_patch") as patch_,
+    ):
+        with pytest.raises(requests.HTTPError):
+            _mark_processed("T", WB, "Table1", "Processed", [_pending(tmp_path, 0)])
+    patch_.assert_not_called()
+
+
+def test_run_msforms_poll_marks_good_batches_before_raising(tmp_path: Path, monkeypatch):
+    for name in (
+        "MS_TENANT_ID",
+        "MS_CLIENT_ID",
+        "MS_CLIENT_SECRET",
+        "SP_HOSTNAME",
+        "SP_SITE_PATH",
+        "SP_FOLDER",
+        "MSFORM_SITE_PATH",
+        "MSFORM_FILE_PATH",
+        "MSFORM_TABLE_NAME",
+    ):
+        monkeypatch.setenv(name, "x")
+    monkeypatch.setenv("MAIL_SENDER_UPN", "sender@x")
+    monkeypatch.setenv("COMPLAINT_EMAIL_TO", "qa@x")
+    monkeypatch.setenv("MSFORM_POLL_WORKERS", "2")
+    monkeypatch.setattr(msforms_poll, "ROWS_PER_BATCH", 2)
+
+    cols = ["Id", "Completion time", "First Name", "Processed"]
+    rows = [
+        {"index": i, "values": [[str(i), "2025-01-02T00:00:00Z", f"N{i}", ""]]} for i in range(6)
+    ]
+
+    def fake_get(token, url):
+        if url.endswith("/dataBodyRange"):
+            return {"address": "Form1!D2:D7", "values": [[""] for _ in rows]}
+        if "/columns?" in url:
+            return {"value": [{"name": c} for c in cols]}
+        return {"value": rows}
+
+    def fake_batch(token, entries):
+        if any("MSF-2" in e["url"] for e in entries):
+            raise requests.HTTPError("batch rejected")
+        return {e["id"]: {"status": 201, "body": {"id": e["id"]}} for e in entries}
+
+    events = []
+    with (
+        patch.object(msforms_poll, "get_token", return_value="T"),
+        patch.object(msforms_poll, "get_site_id", return_value="S"),
+        patch.object(msforms_poll, "get_default_drive_id", return_value="D"),
+        patch.object(msforms_poll, "_graph_get", side_effect=fake_get),
+        patch.object(msforms_poll, "graph_batch", side_effect=fake_batch),
+        patch.object(
+            msforms_poll, "_graph_patch", side_effect=lambda *a: events.append(("patch", a))
+        ),
+        patch.object(msforms_poll, "send_mail_with_attachments") as send,
+    ):
+        with pytest.raises(requests.HTTPError, match="batch rejected"):
+            msforms_poll.run_msforms_poll(str(tmp_path))
+
+    # Rows 2 and 3 shared the failed batch; everything else is marked in one
+    # slice PATCH that still happens before the error propagates
+    ((_, (_, url, payload)),) = events
+    assert url.endswith("/worksheets/Form1/range(address='D2:D7')")
+    assert payload == {"values": [["Yes"], ["Yes"], [""], [""], ["Yes"], ["Yes"]]}
+    assert send.call_count == 4
@@ -0,0 +1,14 @@
+import base64
+from pathlib import Path
+
+from complaints_pipeline.notify import _file_attachment
+
+
+def test_file_attachment_matches_stdlib_base64(tmp_path: Path):
+    data = bytes(range(256)) * 1000 + b"tail"
+    p = tmp_path / "a.pdf"
+    p.write_bytes(data)
+
+    att = _file_attachment(p)
+    assert att["name"] == "a.pdf"
+    assert att["contentBytes"] == base64.b64encode(data).decode("ascii")
@@ -1,6 +1,17 @@
-from complaints_pipeline.pdf_report import build_pdf_bytes
+from complaints_pipeline.pdf_report import build_pdf_bytes, build_pdf_to_path
 
 
 def test_pdf_bytes_starts_with_pdf_magic():
     b = build_pdf_bytes("Title", {"first_name": "A"})
     assert b[:4] == b"%PDF"
+
+
+def test_pdf_to_path_matches_bytes_magic(tmp_path):
+    out = build_pdf_to_path(tmp_path / "x.pdf", "Title", {"first_name": "A"})
+    assert out.read_bytes()[:4] == b"%PDF"
+
+
+def test_pdf_handles_markup_and_long_values():
+    fields = {"complaint_description": "<broken & odd>\n" + "x" * 5000, "comments": "a " * 3000}
+    b = build_pdf_bytes("A & B", fields)
+    assert b[:4] == b"%PDF"
@@ -1,4 +1,15 @@
-from complaints_pipeline.schema import PDF_SECTIONS, SHEET_COLUMNS
+from complaints_pipeline.schema import (
+    NORMALIZED_QUESTION_MAP,
+    PDF_KEY_SECTION,
+    PDF_SECTION_KEYS,
+    PDF_SECTIONS,
+    SHEET_COLUMNS,
+    SHEET_COLUMNS_CSV_HEADER,
+    SHEET_COLUMNS_INDEX,
+    SHEET_COLUMNS_SET,
+    canonical_question,
+    normalize_question,
+)
 
 
 def test_schema_columns_unique_and_nonempty():
@@ -10,3 +21,38 @@ def test_pdf_sections_cover_known_keys():
     keys = {k for _, ks in PDF_SECTIONS for k in ks}
     assert "first_name" in keys
     assert "complaint_description" in keys
+
+def test_normalized_question_map_keys_are_normalized():
+    assert all(normalize_question(k) == k for k in NORMALIZED_QUESTION_MAP)
+    assert set(NORMALIZED_QUESTION_MAP.values()) <= set(SHEET_COLUMNS)
+
+def test_sheet_columns_lookup_tables_match_order():
+    assert SHEET_COLUMNS_SET == set(SHEET_COLUMNS)
+    assert [SHEET_COLUMNS[SHEET_COLUMNS_INDEX[c]] for c in SHEET_COLUMNS] == list(SHEET_COLUMNS)
+
+def test_normalize_question_collapses_any_whitespace():
+    assert normalize_question("  First   Name ") == "first name"
+    for ws in ("\t", "\n", "\r", "\v", "\f", "\xa0", " ", "\x1f"):
+        assert normalize_question(f"Lot{ws}Serial") == "lot serial"
+
+def test_canonical_question_folds_spelling_variants():
+    for q in ("Lot / Serial Number", "lot/serial no", "LOT / SERIAL NO"):
+        assert NORMALIZED_QUESTION_MAP[canonical_question(q)] == "lot_serial_no"
+    assert canonical_question("Purchased from (Distributer)") == "purchased from (distributor)"
+    assert canonical_question("Complaint No.") == "complaint no"
+    assert canonical_question("Should this complaint be reported to authorities ?") == (
+        "should this complaint be reported to authorities?"
+    )
+
+def test_pdf_section_lookup_tables():
+    assert PDF_SECTION_KEYS <= SHEET_COLUMNS_SET
+    for k in PDF_SECTION_KEYS:
+        assert k in PDF_SECTIONS[PDF_KEY_SECTION[k]][1]
+
+def test_sheet_columns_csv_header_matches_csv_module():
+    import csv
+    import io
+
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(SHEET_COLUMNS)
+    assert SHEET_COLUMNS_CSV_HEADER == buf.getvalue().encode("utf-8")
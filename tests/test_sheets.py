@@ -0,0 +1,166 @@
+from unittest.mock import MagicMock
+
+import pytest
+from gspread.http_client import HTTPClient
+
+from complaints_pipeline.schema import SHEET_COLUMNS
+from complaints_pipeline.sheets import (
+    create_worksheet_with_header,
+    ensure_header,
+    get_or_create_worksheet,
+    iter_complaints,
+    open_spreadsheet,
+    read_all_complaints,
+    read_all_complaints_rows,
+)
+
+
+def _fake_ws(records):
+    ws = MagicMock()
+    ws.row_values.return_value = list(SHEET_COLUMNS)
+    ws.get_values.return_value = [list(SHEET_COLUMNS)] + [
+        [r.get(c, "") for c in SHEET_COLUMNS] for r in records
+    ]
+    return ws
+
+
+def test_iter_complaints_fetches_header_and_rows_in_one_call():
+    ws = _fake_ws([{"first_name": "A"}])
+    it = iter_complaints(ws)
+    ws.get_values.assert_called_once_with("A1:X")
+    ws.row_values.assert_not_called()
+    rows = list(it)
+    assert rows[0]["first_name"] == "A"
+    assert set(rows[0]) == set(SHEET_COLUMNS)
+
+
+def test_iter_complaints_pads_short_rows_and_rejects_bad_header():
+    ws = _fake_ws([])
+    ws.get_values.return_value = [list(SHEET_COLUMNS), ["2025-01-01"]]
+    (row,) = iter_complaints(ws)
+    assert row["date"] == "2025-01-01" and row["comments"] == ""
+
+    ws.get_values.return_value = [["wrong"] + list(SHEET_COLUMNS[1:])]
+    with pytest.raises(RuntimeError):
+        iter_complaints(ws)
+
+
+def test_read_all_complaints_returns_list():
+    ws = _fake_ws([{"first_name": "A"}, {"first_name": "B"}])
+    assert [r["first_name"] for r in read_all_complaints(ws)] == ["A", "B"]
+
+
+def test_ensure_header_is_checked_once_per_worksheet():
+    ws = _fake_ws([])
+    ensure_header(ws)
+    ensure_header(ws)
+    ws.row_values.assert_called_once_with(1)
+
+    ensure_header(ws, force=True)
+    assert ws.row_values.call_count == 2
+
+
+def test_ensure_header_writes_empty_sheet_header_raw_in_one_call():
+    ws = _fake_ws([])
+    ws.title = "Complaints"
+    ws.row_values.return_value = []
+    ensure_header(ws)
+    ws.spreadsheet.values_update.assert_called_once_with(
+        "'Complaints'!A1",
+        params={"valueInputOption": "RAW"},
+        body={"values": [list(SHEET_COLUMNS)]},
+    )
+    ws.update.assert_not_called()
+
+
+def test_ensure_header_tolerates_padded_header_cells():
+    ws = _fake_ws([])
+    ws.row_values.return_value = [f" {c} " for c in SHEET_COLUMNS] + ["extra"]
+    ensure_header(ws)
+    ws.spreadsheet.values_update.assert_not_called()
+
+
+def test_read_all_complaints_rows_pads_to_header_width():
+    ws = _fake_ws([])
+    ws.get_values.return_value = [list(SHEET_COLUMNS), ["2025-01-01"]]
+    header, rows = read_all_complaints_rows(ws)
+    assert header == list(SHEET_COLUMNS)
+    assert rows == [["2025-01-01"] + [""] * (len(SHEET_COLUMNS) - 1)]
+
+
+def test_header_mismatch_error_names_the_offending_column():
+    ws = _fake_ws([])
+    ws.get_values.return_value = [list(SHEET_COLUMNS[:2]) + ["wrong"] + list(SHEET_COLUMNS[3:])]
+    with pytest.raises(
+        RuntimeError, match=r"Column C \(index 2\): expected 'first_name', got 'wrong'"
+    ):
+        iter_complaints(ws)
+
+    ws.get_values.return_value = [list(SHEET_COLUMNS[:-1])]
+    with pytest.raises(RuntimeError, match=r"index 23"):
+        iter_complaints(ws)
+
+
+def test_iter_complaints_is_lazy_after_the_fetch():
+    ws = _fake_ws([{"first_name": "A"}, {"first_name": "B"}])
+    it = iter_complaints(ws)
+    assert next(it)["first_name"] == "A"
+    assert [r["first_name"] for r in it] == ["B"]
+    ws.get_values.assert_called_once()
+
+
+def test_get_or_create_worksheet_creates_with_header_in_one_batch():
+    sh = MagicMock()
+    sh.id = "sheet123"
+    sh.client = MagicMock(spec=HTTPClient)
+    existing = MagicMock(title="Other", id=7)
+    sh.worksheets.return_value = [existing]
+    sh.batch_update.return_value = {
+        "replies": [{"addSheet": {"properties": {"sheetId": 8, "title": "Complaints", "index": 1}}}]
+    }
+
+    ws = get_or_create_worksheet(sh, "Complaints")
+
+    sh.batch_update.assert_called_once()
+    add, cells = sh.batch_update.call_args.args[0]["requests"]
+    assert add["addSheet"]["properties"]["sheetId"] == 8
+    assert cells["updateCells"]["start"] == {"sheetId": 8, "rowIndex": 0, "columnIndex": 0}
+    values = cells["updateCells"]["rows"][0]["values"]
+    assert [v["userEnteredValue"]["stringValue"] for v in values] == list(SHEET_COLUMNS)
+    assert ws.title == "Complaints" and ws.id == 8
+
+    # The header is known to be right, so no read is needed
+    ensure_header(ws)
+    sh.client.values_get.assert_not_called()
+
+    sh.worksheets.return_value = [existing, ws]
+    assert get_or_create_worksheet(sh, "Complaints") is ws
+    sh.batch_update.assert_called_once()
+
+
+def test_ensure_header_treats_blank_cells_as_empty_sheet():
+    ws = _fake_ws([])
+    ws.row_values.return_value = ["", "  "]
+    ensure_header(ws)
+    ws.spreadsheet.values_update.assert_called_once()
+
+
+def test_open_spreadsheet_is_memoized_per_client_and_id():
+    gc = MagicMock()
+    assert open_spreadsheet(gc, "a") is open_spreadsheet(gc, "a")
+    gc.open_by_key.assert_called_once_with("a")
+    open_spreadsheet(gc, "b")
+    assert gc.open_by_key.call_count == 2
+
+
+def test_create_worksheet_keeps_sheet_id_within_int32(monkeypatch):
+    sh = MagicMock()
+    sh.client = MagicMock(spec=HTTPClient)
+    sh.batch_update.return_value = {
+        "replies": [{"addSheet": {"properties": {"sheetId": 1, "title": "New"}}}]
+    }
+
+    create_worksheet_with_header(sh, "New", taken_ids=[2**31 - 1, 2])
+
+    add = sh.batch_update.call_args.args[0]["requests"][0]
+    assert add["addSheet"]["properties"]["sheetId"] == 1
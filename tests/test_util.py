@@ -0,0 +1,23 @@
+from complaints_pipeline.util import iso_date_parts, safe_filename, utc_ts
+
+
+def test_safe_filename_collapses_disallowed_runs():
+    assert safe_filename(" MSF-12 / a__b ") == "MSF-12_a_b"
+    assert safe_filename("__x  y.pdf__") == "x_y.pdf"
+    assert safe_filename("///") == "file"
+    assert len(safe_filename("a" * 500)) == 120
+
+
+def test_utc_ts_and_iso_date_parts_format():
+    ts = utc_ts()
+    assert len(ts) == 15 and ts[8] == "_" and ts.replace("_", "").isdigit()
+    assert iso_date_parts("2025-03-04T23:30:00-02:00") == ("2025", "03", "05")
+
+
+def test_iso_date_parts_fast_path_agrees_with_full_parse():
+    assert iso_date_parts("2025-01-02T03:04:05Z") == ("2025", "01", "02")
+    assert iso_date_parts("2025-01-02T03:04:05.123+00:00") == ("2025", "01", "02")
+    # An impossible date is not sliced into a folder name
+    assert iso_date_parts("2025-02-30T00:00:00Z") == iso_date_parts("not a date")
+    # Offsets still go through the full parse and convert to UTC
+    assert iso_date_parts("2025-01-02T23:00:00-05:00") == ("2025", "01", "03")